@@ -1,7 +1,10 @@
 '''TODO: Grade command docs
 '''
+import argparse
 import logging
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from grader.models import Grader
 from grader.utils.config import require_grader_config
 
@@ -10,11 +13,28 @@ logger = logging.getLogger(__name__)
 help = "Grade assignment submission(s)"
 
 
+def positive_int(value):
+    """An argparse type for integers greater than zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "{} is not a positive integer".format(value)
+        )
+    return number
+
+
 def setup_parser(parser):
     parser.add_argument('--rebuild', action='store_true',
                         help='Rebuild containers (if they exist).')
     parser.add_argument('--suppress_output', action='store_false',
                         help='Don\'t display output.')
+    parser.add_argument('-j', '--concurrency', type=positive_int, default=1,
+                        help='Number of students to grade at once. '
+                        'When more than one, each line of output is '
+                        'prefixed with its student\'s ID.')
     parser.add_argument('assignment',
                         help='Name of the assignment to grade.')
     parser.add_argument('student_id', nargs='?',
@@ -36,8 +56,27 @@ def run(args):
             logger.error("Cannot find student %s", args.student_id)
             return
 
-    for user_id, submissions in users.items():
+    # Ask docker for existing containers once, rather than once per
+    # submission
+    containers = a.get_submission_containers(
+        [s for submissions in users.values() for s in submissions]
+    )
+
+    def grade_user(user_id, submissions):
+        # A user's submissions are graded one after another, so that
+        # they don't fight over result file names
         logger.info("Grading submissions for %s", user_id)
         for submission in submissions:
             submission.grade(a, rebuild_container=args.rebuild,
-                             show_output=args.suppress_output)
+                             show_output=args.suppress_output,
+                             containers=containers,
+                             prefix_output=args.concurrency > 1)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(grade_user, user_id, submissions)
+                   for user_id, submissions in users.items()]
+
+        for done, future in enumerate(as_completed(futures), 1):
+            # Re-raise anything that went wrong while grading
+            future.result()
+            logger.info("Grading: %d/%d done", done, len(futures))
@@ -1,10 +1,12 @@
 import docker
 import itertools
 import logging
+import operator
 import os
 import shutil
 import tempfile
 
+from .config import AssignmentConfig
 from .gradesheet import GradeSheet
 from .mixins import DockerClientMixin
 from .submission import Submission
@@ -86,34 +88,49 @@ class Assignment(DockerClientMixin):
         :raises GradeSheetError: if there was an error creating
             the GradeSheet
 
-        :raises ConfigValidationError: if there was an error
-            creating the GradeSheet's assignment-specific config file
+        :raises ConfigValidationError: if ``assignment_name`` is
+            invalid, or if there was an error creating the
+            GradeSheet's assignment-specific config file
 
         """
         logger.debug("Creating assignment %s.", assignment_name)
+
+        # Check the name before touching the filesystem. A bad name
+        # shouldn't cost us anything (or sneak a "../" into the path).
+        AssignmentConfig.validate_name(assignment_name)
+
         path = os.path.join(grader.assignment_dir, assignment_name)
 
-        # Make sure the parent directory exists
-        if not os.path.exists(grader.assignment_dir) \
-           or not os.path.isdir(grader.assignment_dir):
+        # Claim the target directory up front. This fails if the
+        # parent directory is missing or the assignment already
+        # exists, without checking for either separately.
+        try:
+            os.mkdir(path)
+        except (FileNotFoundError, NotADirectoryError) as e:
             raise FileNotFoundError(
                 "{} does not exist. "
                 "Cannot create assignment.".format(grader.assignment_dir)
-            )
-
-        # Make sure the target directory doesn't exist
-        if os.path.exists(path):
+            ) from e
+        except FileExistsError as e:
             raise FileExistsError(
                 "{} exists. Cannot create assignment.".format(path)
-            )
-
-        logger.debug("Creating assignment in temporary directory...")
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Setup all the files/folders for the assignment
-            cls._setup_assignment(tmpdir, assignment_name, gradesheet_repo)
+            ) from e
 
-            # If we have succeeded so far, copy everything over
-            shutil.copytree(tmpdir, path)
+        try:
+            logger.debug("Creating assignment in temporary directory...")
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Setup all the files/folders for the assignment
+                cls._setup_assignment(tmpdir, assignment_name,
+                                      gradesheet_repo)
+
+                # If we have succeeded so far, copy everything over
+                for name in os.listdir(tmpdir):
+                    shutil.copytree(os.path.join(tmpdir, name),
+                                    os.path.join(path, name))
+        except BaseException:
+            # Don't leave a half-built assignment lying around
+            shutil.rmtree(path, ignore_errors=True)
+            raise
 
         return cls(grader, assignment_name)
 
@@ -142,28 +159,24 @@ class Assignment(DockerClientMixin):
         else:
             GradeSheet.new(gradesheet_dir, assignment_name)
 
-    @property
-    def image_tag(self):
-        """Unique tag for an assignment's docker image"""
-        return "{}-{}-{}".format(self.grader.config['course-id'],
-                                 self.grader.config['course-name'],
-                                 self.name)
-
     @property
     def image_id(self):
-        """Unique ID for an assignment's docker image"""
-        try:
-            return self.docker_cli.inspect_image(self.image_tag)['Id']
-        except docker.errors.NotFound as e:
-            logger.debug(str(e))
-            raise AssignmentBuildError(
-                "{}'s image was not built.".format(self.name)
-            ) from e
+        """Unique ID for an assignment's docker image. It's looked up once
+        and then cached, since every submission being graded compares
+        its container against it. Building or deleting the image
+        through this Assignment clears the cache.
 
-    @property
-    def submissions_dir(self):
-        """File path to the assignment's submissions directory"""
-        return os.path.join(self.path, "submissions")
+        """
+        if self._image_id is None:
+            try:
+                image = self.docker_cli.inspect_image(self.image_tag)
+            except docker.errors.NotFound as e:
+                logger.debug(str(e))
+                raise AssignmentBuildError(
+                    "{}'s image was not built.".format(self.name)
+                ) from e
+            self._image_id = image['Id']
+        return self._image_id
 
     @property
     def submissions(self):
@@ -174,19 +187,42 @@ class Assignment(DockerClientMixin):
     @property
     def submissions_by_user(self):
         """All submissions for this assignment grouped by user"""
-        submissions = sorted(self.submissions, key=lambda x: x.user_id)
-        groups = itertools.groupby(submissions, key=lambda x: x.user_id)
-        return {k: sorted(g, key=lambda x: x.import_time) for k, g in groups}
+        by_user_id = operator.attrgetter('user_id')
+        by_import_time = operator.attrgetter('import_time')
+        submissions = sorted(self.submissions, key=by_user_id)
+        groups = itertools.groupby(submissions, key=by_user_id)
+        return {k: sorted(g, key=by_import_time) for k, g in groups}
 
-    @property
-    def results_dir(self):
-        """File path to the assignment's results directory"""
-        return os.path.join(self.path, "results")
+    def get_submission_containers(self, submissions=None):
+        """Retrieves containers for submissions from the docker host.
 
-    @property
-    def gradesheet_dir(self):
-        """File path to the assignment's gradesheet repository"""
-        return os.path.join(self.path, GradeSheet.SUB_DIR)
+        Containers are named after their submission's full ID, so
+        docker does the filtering, and only the containers we're
+        interested in come back over the socket.
+
+        :param list submissions: The submissions to look for. Defaults
+            to all of this assignment's submissions.
+
+        :return: Lists of containers, keyed by submission UUID
+        :rtype: dict
+
+        """
+        if submissions is None:
+            submissions = self.submissions
+        if not submissions:
+            return {}
+
+        filters = {
+            'label': 'submission_uuid',
+            'name': [s.full_id for s in submissions],
+        }
+        containers = self.docker_cli.containers(all=True, filters=filters)
+
+        by_uuid = {}
+        for container in containers:
+            uuid = container['Labels']['submission_uuid']
+            by_uuid.setdefault(uuid, []).append(container)
+        return by_uuid
 
     def __init__(self, grader, assignment_name):
         """Instantiate a new Assignment
@@ -213,23 +249,36 @@ class Assignment(DockerClientMixin):
         self.name = assignment_name
         self.grader = grader
 
-        # Verify that paths exist like we expect
-        if not os.path.exists(self.path):
-            raise FileNotFoundError(
-                "%s has no assignment directory", self.name
-            )
-        if not os.path.exists(self.submissions_dir):
-            raise FileNotFoundError(
-                "%s has no submissions directory", self.name
-            )
-        if not os.path.exists(self.results_dir):
-            raise FileNotFoundError(
-                "%s has no results directory", self.name
-            )
-        if not os.path.exists(self.gradesheet_dir):
+        self.image_tag = "{}-{}-{}".format(self.grader.config['course-id'],
+                                           self.grader.config['course-name'],
+                                           self.name)
+        """Unique tag for an assignment's docker image"""
+
+        self.submissions_dir = os.path.join(self.path, "submissions")
+        """File path to the assignment's submissions directory"""
+
+        self.results_dir = os.path.join(self.path, "results")
+        """File path to the assignment's results directory"""
+
+        self.gradesheet_dir = os.path.join(self.path, GradeSheet.SUB_DIR)
+        """File path to the assignment's gradesheet repository"""
+
+        self._image_id = None
+
+        # Verify that paths exist like we expect. One scandir gets us
+        # everything we need to know, rather than a stat per path.
+        try:
+            entries = {e.name: e for e in os.scandir(self.path)}
+        except FileNotFoundError as e:
             raise FileNotFoundError(
-                "%s has no gradesheet directory", self.name
-            )
+                "{} has no assignment directory".format(self.name)
+            ) from e
+
+        for subdir in ("submissions", "results", GradeSheet.SUB_DIR):
+            if subdir not in entries or not entries[subdir].is_dir():
+                raise FileNotFoundError(
+                    "{} has no {} directory".format(self.name, subdir)
+                )
 
         self.gradesheet = GradeSheet(self)
 
@@ -269,20 +318,24 @@ class Assignment(DockerClientMixin):
             # asynchronously
             prompt = "building {}>".format(self.name)
             for line in output:
-                error = 'Error: "{}"\n'.format(line.get('error', ''))
-                stream = line.get('stream', '')
-                print(prompt, stream or error, end="")
+                # Only bother formatting an error message if there's
+                # no regular output on this line
+                text = (line.get('stream') or
+                        'Error: "{}"\n'.format(line.get('error', '')))
+                print(prompt, text, end="")
         except docker.errors.APIError as e:
             logger.debug(str(e))
             raise AssignmentBuildError(
                 "Unable to build: {}".format(e.explanation.decode("utf-8"))
             ) from e
 
+        self._image_id = None
         return self.image_id
 
     def delete_image(self):
         """Deletes an assignment's docker image based on its tag.
         """
+        self._image_id = None
         self.docker_cli.remove_image(self.image_tag)
 
     def import_submission(self, path, submission_type):
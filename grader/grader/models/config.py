@@ -1,3 +1,4 @@
+import functools
 import jsonschema
 import logging
 import os
@@ -12,6 +13,22 @@ class ConfigValidationError(Exception):
     pass
 
 
+@functools.lru_cache(maxsize=None)
+def _get_validator(config_class, prop=None):
+    """Returns a JSONSchema validator for a Config subclass's
+    :data:`SCHEMA`, or for just one of its properties if ``prop`` is
+    given. A schema never changes, so it's only checked and turned
+    into a validator the first time it's used.
+
+    """
+    schema = config_class.SCHEMA
+    validator_class = jsonschema.validators.validator_for(schema)
+    if prop is not None:
+        schema = schema['properties'][prop]
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
 class Config(object):
     """A base class for configuration objects. Provides two vaguely-useful
     methods to subclasses.
@@ -61,7 +78,7 @@ class Config(object):
     @classmethod
     def _validate(cls, obj):
         try:
-            jsonschema.validate(obj, cls.SCHEMA)
+            _get_validator(cls).validate(obj)
         except jsonschema.ValidationError as e:
             raise ConfigValidationError(
                 "{} is invalid.\n{}".format(cls.CONFIG_FILE_NAME, str(e))
@@ -189,3 +206,21 @@ class AssignmentConfig(Config):
         "additionalProperties": False
     }
     """The schema for a Assignment-wide configuration file"""
+
+    @classmethod
+    def validate_name(cls, name):
+        """Checks an assignment name against the ``assignment-name``
+        rules in :data:`SCHEMA`
+
+        :param str name: The assignment name to check
+
+        :raises ConfigValidationError: if the name isn't valid
+
+        """
+        try:
+            _get_validator(cls, 'assignment-name').validate(name)
+        except jsonschema.ValidationError as e:
+            raise ConfigValidationError(
+                '"{}" is not a valid assignment name: {}'.format(name,
+                                                                 e.message)
+            ) from e
@@ -102,9 +102,11 @@ class Grader(object):
         :return: None
 
         """
-        if not os.path.exists(self.assignment_dir):
-            logger.info("Creating assignment directory.")
+        try:
             os.mkdir(self.assignment_dir)
+            logger.info("Created assignment directory.")
+        except FileExistsError:
+            pass
 
         logger.debug("Creating assignment")
         Assignment.new(self, name, repo)
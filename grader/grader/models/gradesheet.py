@@ -39,21 +39,43 @@ class GradeSheet(object):
     """
 
     @classmethod
-    def from_repo(cls, gradesheet_path, repo_url):
+    def from_repo(cls, gradesheet_path, repo_url, depth=1):
         """Clone a gradesheet from a remote git repository.
 
+        By default, only the latest commit of the default branch is
+        fetched, and no tags. Grading only needs the working tree, so
+        there's no sense in pulling down the whole history.
+
+        .. note::
+
+           A shallow clone has no history to speak of, so things like
+           ``git log``, ``git bisect`` or ``git merge-base`` won't be
+           much use in the gradesheet. Pass ``depth=None`` if you need
+           the full history.
+
         :param str gradesheet_path: The path to the directory into
             which the gradesheet repository will be cloned.
 
         :param str repo_url: A URL pointing to a gradesheet repository
             to clone.
 
+        :param int depth: The number of commits to fetch. If None,
+            the full history is cloned.
+
         :raises GradeSheetError: if there was a problem cloning
             the repo
 
         """
+        clone_options = {}
+        if depth is not None:
+            clone_options.update({
+                "depth": depth,
+                "single_branch": True,
+                "no_tags": True,
+            })
+
         try:
-            git.Repo.clone_from(repo_url, gradesheet_path)
+            git.Repo.clone_from(repo_url, gradesheet_path, **clone_options)
             logger.info("Successfully cloned {}".format(repo_url))
         except git.exc.GitCommandError as e:
             raise GradeSheetError("Could not clone {}".format(repo_url)) from e
@@ -89,9 +111,13 @@ class GradeSheet(object):
         return None
 
     @property
-    def dockerfile_path(self):
-        """The path to this gradesheet's Dockerfile"""
-        return os.path.join(self.path, "Dockerfile")
+    def repository(self):
+        """The gradesheet's git repository, as a git.Repo object. It's
+        only loaded the first time it's needed, since most grading
+        never touches it."""
+        if self._repository is None:
+            self._repository = git.Repo(self.path)
+        return self._repository
 
     @property
     def templates(self):
@@ -114,8 +140,12 @@ class GradeSheet(object):
         """
         self.path = assignment.gradesheet_dir
         self.assignment = assignment
+
+        self.dockerfile_path = os.path.join(self.path, "Dockerfile")
+        """The path to this gradesheet's Dockerfile"""
+
         self.config = AssignmentConfig(self.path)
-        self.repository = git.Repo(self.path)
+        self._repository = None
 
         # Verify that paths exist like we expect
         if not os.path.exists(self.dockerfile_path):
@@ -1,8 +1,33 @@
 import docker
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+
+
+def _get_docker_client():
+    """Returns a docker Client for the current thread. It's created on
+    that thread's first use and reused from then on. Creating a client
+    with ``version="auto"`` costs a round trip to the docker daemon,
+    so we only want to do it once per thread.
+
+    Clients aren't shared between threads: each one wraps a
+    ``requests`` session whose connection pool only holds a single
+    connection to the docker socket.
+
+    """
+    docker_cli = getattr(_local, "docker_cli", None)
+    if docker_cli is None:
+        logger.debug("Creating Docker client")
+        docker_cli = docker.Client(
+            base_url="unix://var/run/docker.sock",
+            version="auto"
+        )
+        _local.docker_cli = docker_cli
+    return docker_cli
+
 
 class DockerClientMixin(object):
     """A mixin class that gives subclasses access to a docker Client
@@ -11,11 +36,6 @@ class DockerClientMixin(object):
 
     @property
     def docker_cli(self):
-        """A docker Client object. Always returns the same one."""
-        if not hasattr(self, "_docker_cli"):
-            logger.debug("Creating Docker client")
-            self._docker_cli = docker.Client(
-                base_url="unix://var/run/docker.sock",
-                version="auto"
-            )
-        return self._docker_cli
+        """A docker Client object. Always returns the same one for a given
+        thread, no matter which object asks for it."""
+        return _get_docker_client()
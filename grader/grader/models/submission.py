@@ -12,10 +12,11 @@ import tempfile
 import uuid
 import yaml
 
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 
-from grader.utils.files import make_tarball
+from grader.utils.files import COMPRESSLEVEL, is_gzip, make_tarball
 
 from .mixins import DockerClientMixin
 
@@ -64,6 +65,10 @@ class Submission(DockerClientMixin):
     )
     """Full submission IDs must match this pattern"""
 
+    TARBALL_NAME_RE = re.compile(r"^(.*?)(?:\.tar\.gz)?$")
+    """Splits a submission item's basename from its ``.tar.gz``
+    extension (if it has one)"""
+
     @classmethod
     def split_full_id(cls, full_id):
         """Splits a full Submission ID into the student's ID, and the
@@ -125,7 +130,7 @@ class Submission(DockerClientMixin):
 
     @classmethod
     def _remove_extension(cls, basename):
-        return re.match(r'^(.*?)(?:\.tar\.gz)?$', basename).group(1)
+        return cls.TARBALL_NAME_RE.match(basename).group(1)
 
     @classmethod
     def _check_tarball(cls, assignment, path, student_id):
@@ -176,7 +181,7 @@ class Submission(DockerClientMixin):
         """
         # Check the name of the item
         basename = os.path.basename(path)
-        match = re.match(r"(.*?)(?:\.tar\.gz)?$", basename)
+        match = cls.TARBALL_NAME_RE.match(basename)
         if match is None:
             raise SubmissionImportError(
                 'Unsure how to handle basename "{}".'.format(basename)
@@ -237,36 +242,78 @@ class Submission(DockerClientMixin):
                 "{} is not a directory. Cannot import.".format(source)
             )
 
+        # List the folder once. DirEntry knows whether it's a file or
+        # a directory without another stat.
+        items = list(os.scandir(source))
+
         # Make sure we can import all the items in this folder
-        for item in os.listdir(source):
-            item = os.path.join(source, item)
-            if os.path.isfile(item) and tarfile.is_tarfile(item):
-                logger.debug("%s is a tarfile", item)
-                continue
-            elif os.path.isdir(item):
-                logger.debug("%s is a directory", item)
-                continue
+        folders = []
+        for item in items:
+            if item.is_file() and tarfile.is_tarfile(item.path):
+                logger.debug("%s is a tarfile", item.path)
+            elif item.is_dir():
+                logger.debug("%s is a directory", item.path)
+                folders.append(item)
             else:
                 raise SubmissionError(
-                    "{} is neither a directory nor a tarball".format(item)
+                    "{} is neither a directory nor a tarball".format(
+                        item.path
+                    )
                 )
 
+        # Don't bother compressing folders that won't be imported
+        def importable(folder):
+            try:
+                cls._check_submission_item(assignment, folder.path)
+                return True
+            except SubmissionError:
+                return False
+
+        folders = [f for f in folders if importable(f)]
+
         # Import the items
         def import_it(path):
             fullpath = os.path.join(source, path)
+            tarball, _ = tarballs.get(path, (None, None))
             try:
                 submission, = cls.import_single(
-                    assignment, fullpath, sid_pattern=sid_pattern
+                    assignment, fullpath, sid_pattern=sid_pattern,
+                    tarball=tarball
                 )
                 return submission
             except SubmissionError as e:
                 logger.info("Could not import %s. %s", path, e)
 
-        return [import_it(p) for p in os.listdir(source)]
+        futures = []
+        try:
+            # Compressing folders is CPU-bound, so tarball all of them
+            # at once on a process pool before importing anything. The
+            # pool already uses every core, so pigz gets one apiece.
+            with ProcessPoolExecutor() as executor:
+                for folder in folders:
+                    futures.append((folder.name, executor.submit(
+                        make_tarball, folder.path, folder.name,
+                        temp_dir=assignment.path, threads=1
+                    )))
+
+            # Every job has finished by now. This raises the first
+            # error, if there was one.
+            tarballs = {name: future.result() for name, future in futures}
+
+            return [import_it(item.name) for item in items]
+        finally:
+            # Clean up after every job that succeeded, even if another
+            # one failed
+            for _, future in futures:
+                if future.done() and not future.cancelled() \
+                   and future.exception() is None:
+                    _, temp_path = future.result()
+                    logger.debug("Removing %s", temp_path)
+                    shutil.rmtree(temp_path)
 
     @classmethod
     def import_single(cls, assignment, source,
-                      sid=None, sid_pattern=r"(?P<id>.*)"):
+                      sid=None, sid_pattern=r"(?P<id>.*)", tarball=None):
         """Imports a single submission.
 
         The submission may be:
@@ -291,6 +338,12 @@ class Submission(DockerClientMixin):
         :param str sid_pattern: An optional pattern to use to convert
             the name of a submission to a submission id
 
+        :param str tarball: An optional, already compressed
+            ``.tar.gz`` of ``source``, if ``source`` is a folder. It
+            will be moved into the submissions directory. The caller
+            is responsible for cleaning up whatever directory it was
+            in.
+
         :return: A list containing a single item: the new Submission
 
         """
@@ -310,23 +363,44 @@ class Submission(DockerClientMixin):
         tar_name = submission_id + ".tar.gz"
         dest = os.path.join(assignment.submissions_dir, tar_name)
 
-        # Prepare the tarball (if necessary)
-        tarball, temp_path = None, None
+        # Prepare the tarball (if necessary). Tarballs we build are
+        # made next to the submissions directory, so that moving them
+        # into place is a rename rather than a second copy.
+        temp_path = None
         if os.path.isdir(source):
             logger.debug("Importing a single directory: %s", source)
-            tarball, temp_path = make_tarball(source, submission_id)
+            if tarball is None:
+                tarball, temp_path = make_tarball(source, submission_id,
+                                                  temp_dir=assignment.path)
+            shutil.move(tarball, dest)
         elif os.path.isfile(source) and tarfile.is_tarfile(source):
             logger.debug("Importing a single tarball: %s", source)
-            tarball = source
+            if is_gzip(source):
+                shutil.copyfile(source, dest)
+            else:
+                # Submissions are always stored as .tar.gz, so
+                # recompress anything else. Build it off to the side,
+                # so a failure never leaves a broken submission behind.
+                logger.debug("Recompressing %s with gzip", source)
+                with tempfile.TemporaryDirectory(dir=assignment.path) as tmp:
+                    tmp_tar = os.path.join(tmp, tar_name)
+                    with tarfile.open(source) as src, \
+                            tarfile.open(tmp_tar, "w:gz",
+                                         compresslevel=COMPRESSLEVEL) as dst:
+                        for member in src:
+                            # Only regular files have contents. Links
+                            # (and friends) are just headers.
+                            fileobj = None
+                            if member.isreg():
+                                fileobj = src.extractfile(member)
+                            dst.addfile(member, fileobj)
+                    shutil.move(tmp_tar, dest)
         else:
             logger.debug("Cannot import this thing.")
             raise SubmissionError(
                 "{} is neither a directory nor a tarball.".format(source)
             )
 
-        # Copy it
-        shutil.copyfile(tarball, dest)
-
         # Clean up if necessary
         if temp_path:
             logger.debug("Removing %s", temp_path)
@@ -551,19 +625,27 @@ class Submission(DockerClientMixin):
                 msg += " Did you build the assignment?"
             raise SubmissionContainerError(msg) from e
 
-    def get_container_id(self, rebuild=True):
+    def get_container_id(self, rebuild=True, containers=None):
         """Retrieve's this submission's container id
 
         :param bool rebuild: Remove the old container and build a new
             one instead.
 
+        :param dict containers: Containers grouped by submission UUID,
+            as returned by :meth:`Assignment.get_submission_containers`.
+            If None, docker is asked for this submission's containers.
+
         :return: The ID of this submission's container
         """
-        # Filter the containers down to the one we want
-        filters = {
-            'label': 'submission_uuid={}'.format(self.uuid)
-        }
-        containers = self.docker_cli.containers(all=True, filters=filters)
+        if containers is None:
+            # Filter the containers down to the one we want
+            filters = {
+                'label': 'submission_uuid={}'.format(self.uuid)
+            }
+            containers = self.docker_cli.containers(all=True,
+                                                    filters=filters)
+        else:
+            containers = containers.get(self.uuid, [])
         logger.debug("Found matching containers: %s", containers)
 
         container_id = None
@@ -617,12 +699,14 @@ class Submission(DockerClientMixin):
         logger.debug("Adding submission files to %s", tmpdir)
         logger.debug("Assignment archive is %s", self.path)
 
-        # Unpack the submission into tmpdir
+        # Unpack the submission into tmpdir. Hand over the file object
+        # itself, so the archive is streamed to docker instead of
+        # being read into memory all at once.
         with open(self.path, mode='rb') as tar:
             self.docker_cli.put_archive(
                 container=c_id,
                 path=tmpdir,
-                data=tar.read()
+                data=tar
             )
 
         output = self.docker_cli.exec_start(
@@ -666,7 +750,8 @@ class Submission(DockerClientMixin):
 
         logger.info("Wrote to %s", path)
 
-    def grade(self, assignment, rebuild_container=False, show_output=True):
+    def grade(self, assignment, rebuild_container=False, show_output=True,
+              containers=None, prefix_output=False):
         """Performs the magic--- prepares the docker container,
         runs the grade command, and writes to logs.
 
@@ -676,11 +761,18 @@ class Submission(DockerClientMixin):
             container and build a new one instead. Defaults to False.
         :param bool show_output: Whether to output STDOUT/STDERR from the
             container to STDOUT. Defaults to True.
+        :param dict containers: Optional pre-fetched containers. See
+            :meth:`get_container_id`.
+        :param bool prefix_output: Whether to start each displayed line
+            of output with the student's ID, so that output from
+            submissions graded at the same time can be told apart.
+            Defaults to False.
 
         :return: None
 
         """
-        c_id = self.get_container_id(rebuild=rebuild_container)
+        c_id = self.get_container_id(rebuild=rebuild_container,
+                                     containers=containers)
         logger.debug("Got container ID %s", c_id)
 
         # Start the container
@@ -701,12 +793,25 @@ class Submission(DockerClientMixin):
         # Retrieve output, displaying to the screen and saving to a
         # string buffer for later
         output_text = io.StringIO()
+        prompt = "{}>".format(self.user_id)
+        pending = ""
         for line in output:
             line = line.decode("utf-8")
-            if show_output:
+            if show_output and prefix_output:
+                # Chunks aren't necessarily whole lines. Only print
+                # complete ones, each in a single call, so that lines
+                # from other threads can't land in the middle.
+                pending += line
+                *lines, pending = pending.split("\n")
+                for complete in lines:
+                    print("{} {}".format(prompt, complete))
+            elif show_output:
                 print(line, end="")
             output_text.write(line)
 
+        if pending:
+            print("{} {}".format(prompt, pending))
+
         self._record_output(output_text.getvalue())
 
         self.docker_cli.stop(
@@ -1,9 +1,11 @@
+import docker
 import pytest
 import shutil
 import tempfile
 import os
 
 from grader import make_parser
+from grader.models import mixins
 
 
 @pytest.fixture
@@ -38,3 +40,90 @@ def parse_and_run(request):
 
     request.addfinalizer(cleanup)
     return _parse_and_run
+
+
+class FakeResponse(object):
+    """Just enough of a requests Response for docker's APIError"""
+    status_code = 404
+    reason = "Not Found"
+    content = b"No such image"
+
+
+class FakeDockerClient(object):
+    """A stand-in for docker.Client that records what it was asked to do.
+    Only implements what the models use.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.containers_list = []
+        self.images = {}
+        self.container_images = {}
+        self.grade_output = [b"graded\n"]
+
+    def containers(self, **kwargs):
+        self.calls.append(('containers', kwargs))
+        return self.containers_list
+
+    def inspect_image(self, tag):
+        self.calls.append(('inspect_image', tag))
+        try:
+            return {'Id': self.images[tag]}
+        except KeyError:
+            raise docker.errors.NotFound("Not Found", FakeResponse())
+
+    def build(self, **kwargs):
+        self.calls.append(('build', kwargs))
+        self.images[kwargs['tag']] = "sha256:{}".format(len(self.calls))
+        return iter([{'stream': "Step 1\n"}])
+
+    def remove_image(self, tag):
+        self.calls.append(('remove_image', tag))
+        del self.images[tag]
+
+    def create_container(self, **kwargs):
+        self.calls.append(('create_container', kwargs))
+        c_id = "new-{}".format(kwargs['name'])
+        self.container_images[c_id] = self.images[kwargs['image']]
+        return {'Id': c_id, 'Warnings': None}
+
+    def remove_container(self, container, force=False):
+        self.calls.append(('remove_container', container))
+
+    def inspect_container(self, container):
+        self.calls.append(('inspect_container', container))
+        return {'Image': self.container_images[container]}
+
+    def start(self, container):
+        self.calls.append(('start', container))
+
+    def stop(self, container):
+        self.calls.append(('stop', container))
+
+    def put_archive(self, container, path, data):
+        self.calls.append(('put_archive', container))
+
+    def exec_create(self, container, cmd, user=None):
+        return {'Id': cmd}
+
+    def exec_start(self, exec_id, stream=False):
+        cmd = exec_id['Id']
+        self.calls.append(('exec_start', cmd))
+        if cmd == "mktemp -d":
+            return b"/tmp/submission\n"
+        if stream:
+            return iter(self.grade_output)
+        return b""
+
+    def calls_to(self, name):
+        return [args for call, args in self.calls if call == name]
+
+
+@pytest.fixture
+def fake_docker(monkeypatch):
+    """Replaces the docker client used by all models with a
+    FakeDockerClient, and returns it.
+    """
+    client = FakeDockerClient()
+    monkeypatch.setattr(mixins, "_get_docker_client", lambda: client)
+    return client
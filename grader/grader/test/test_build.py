@@ -88,3 +88,28 @@ def test_build_missing_assignment_specific_dir(parse_and_run):
 
     with pytest.raises(FileNotFoundError):
         parse_and_run(["build", "a1"])
+
+
+def test_image_id_cached(parse_and_run, fake_docker):
+    """Test that an assignment's image ID is only looked up once, and
+    that building or deleting the image forgets it
+    """
+    path = parse_and_run(["init", "cpl"])
+    parse_and_run(["new", "a1"])
+    a = Grader(path).get_assignment("a1")
+    fake_docker.images[a.image_tag] = "sha256:old"
+
+    assert a.image_id == "sha256:old"
+    assert a.image_id == "sha256:old"
+    assert len(fake_docker.calls_to('inspect_image')) == 1
+
+    # Building looks the new image up again
+    new_id = a.build_image()
+    assert new_id != "sha256:old"
+    assert a.image_id == new_id
+    assert len(fake_docker.calls_to('inspect_image')) == 2
+
+    # Deleting forgets it
+    a.delete_image()
+    with pytest.raises(AssignmentBuildError):
+        a.image_id
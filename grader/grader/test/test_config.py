@@ -4,6 +4,7 @@ import uuid
 import yaml
 
 from grader.models import Grader, AssignmentConfig, ConfigValidationError
+from grader.models.config import _get_validator
 
 
 def write_config(path, name, config):
@@ -197,3 +198,17 @@ def test_bad_assignment_name(clean_dir):
 
     with pytest.raises(ConfigValidationError):
         AssignmentConfig(clean_dir)
+
+
+def test_validate_assignment_name():
+    """Test checking an assignment name on its own
+    """
+    AssignmentConfig.validate_name("assignment-1")
+
+    with pytest.raises(ConfigValidationError) as e:
+        AssignmentConfig.validate_name("../nope")
+    assert '"../nope" is not a valid assignment name' in str(e.value)
+
+    # The validator is only built once
+    validator = _get_validator(AssignmentConfig, 'assignment-name')
+    assert validator is _get_validator(AssignmentConfig, 'assignment-name')
@@ -0,0 +1,177 @@
+import os
+import pytest
+
+from test_import import init_and_build_roster, make_student_folder
+
+from grader import make_parser
+from grader.models import Grader
+from grader.models.submission import SubmissionContainerError
+
+
+@pytest.mark.parametrize("concurrency", ["0", "-2", "lots"])
+def test_grade_bad_concurrency(concurrency):
+    """Test that -j only accepts positive integers
+    """
+    parser = make_parser()
+    with pytest.raises(SystemExit):
+        parser.parse_args(["grade", "-j", concurrency, "a1"])
+
+
+def test_grade_concurrency():
+    """Test parsing a valid -j
+    """
+    parser = make_parser()
+    args = parser.parse_args(["grade", "-j", "4", "a1"])
+    assert args.concurrency == 4
+
+
+def make_assignment(clean_dir, parse_and_run, student_ids):
+    """Makes an assignment with one imported submission per student, and
+    returns it along with its submissions (sorted by student ID)
+    """
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+    for student_id in student_ids:
+        student_dir = make_student_folder(clean_dir, student_id)
+        parse_and_run(["import", "--kind=single", "a1", student_dir])
+
+    a = Grader(path).get_assignment("a1")
+    submissions = sorted(a.submissions, key=lambda s: s.user_id)
+    return a, submissions
+
+
+def container(c_id, submission):
+    return {
+        'Id': c_id,
+        'Labels': {'user_id': submission.user_id,
+                   'submission_uuid': submission.uuid},
+    }
+
+
+def test_get_submission_containers(clean_dir, parse_and_run, fake_docker):
+    """Test fetching containers for several submissions at once
+    """
+    a, (fmm, jtd) = make_assignment(clean_dir, parse_and_run,
+                                    ["fmm000", "jtd111"])
+    fmm_c, jtd_c1, jtd_c2 = (container("c1", fmm), container("c2", jtd),
+                             container("c3", jtd))
+    fake_docker.containers_list = [fmm_c, jtd_c1, jtd_c2]
+
+    containers = a.get_submission_containers([fmm, jtd])
+
+    # Docker does the filtering...
+    kwargs, = fake_docker.calls_to('containers')
+    assert kwargs == {
+        'all': True,
+        'filters': {'label': 'submission_uuid',
+                    'name': [fmm.full_id, jtd.full_id]},
+    }
+
+    # ... and we group by submission
+    assert containers == {fmm.uuid: [fmm_c], jtd.uuid: [jtd_c1, jtd_c2]}
+
+    # Defaults to all of the assignment's submissions
+    a.get_submission_containers()
+    _, kwargs = fake_docker.calls_to('containers')
+    assert sorted(kwargs['filters']['name']) == [fmm.full_id, jtd.full_id]
+
+
+def test_get_submission_containers_empty(clean_dir, parse_and_run,
+                                         fake_docker):
+    """Test that docker isn't asked about no submissions at all
+    """
+    a, _ = make_assignment(clean_dir, parse_and_run, [])
+
+    assert a.get_submission_containers([]) == {}
+    assert a.get_submission_containers() == {}
+    assert fake_docker.calls_to('containers') == []
+
+
+def test_get_container_id_prefetched(clean_dir, parse_and_run, fake_docker):
+    """Test looking up containers from a prefetched dict
+    """
+    a, (fmm, jtd) = make_assignment(clean_dir, parse_and_run,
+                                    ["fmm000", "jtd111"])
+    fake_docker.images[a.image_tag] = "sha256:1"
+    fake_docker.container_images.update({"c1": "sha256:1",
+                                         "c2": "sha256:1",
+                                         "c3": "sha256:1"})
+
+    # No container yet, so one gets created
+    assert fmm.get_container_id(rebuild=False, containers={}) == \
+        "new-{}".format(fmm.full_id)
+
+    # An existing container gets reused...
+    containers = {fmm.uuid: [container("c1", fmm)]}
+    assert fmm.get_container_id(rebuild=False, containers=containers) == "c1"
+    assert fake_docker.calls_to('remove_container') == []
+
+    # ... unless we're rebuilding
+    assert fmm.get_container_id(rebuild=True, containers=containers) == \
+        "new-{}".format(fmm.full_id)
+    assert fake_docker.calls_to('remove_container') == ["c1"]
+
+    # More than one needs a human
+    containers = {jtd.uuid: [container("c2", jtd), container("c3", jtd)]}
+    with pytest.raises(SubmissionContainerError):
+        jtd.get_container_id(rebuild=False, containers=containers)
+
+    # None of that asked docker for containers
+    assert fake_docker.calls_to('containers') == []
+
+
+def test_grade_fetches_containers_once(clean_dir, parse_and_run,
+                                       fake_docker):
+    """Test that grading asks docker for containers once per run
+    """
+    a, (fmm, jtd) = make_assignment(clean_dir, parse_and_run,
+                                    ["fmm000", "jtd111"])
+    fake_docker.images[a.image_tag] = "sha256:1"
+    fake_docker.container_images["c1"] = "sha256:1"
+    fake_docker.containers_list = [container("c1", fmm)]
+
+    parse_and_run(["grade", "-j", "2", "--suppress_output", "a1"])
+
+    assert len(fake_docker.calls_to('containers')) == 1
+    assert sorted(fake_docker.calls_to('start')) == \
+        ["c1", "new-{}".format(jtd.full_id)]
+    assert len(os.listdir(a.results_dir)) == 2
+
+
+def test_grade_concurrent_output_prefixed(clean_dir, parse_and_run,
+                                          fake_docker, capsys):
+    """Test that output from concurrent grading says whose it is
+    """
+    a, _ = make_assignment(clean_dir, parse_and_run, ["fmm000", "jtd111"])
+    fake_docker.images[a.image_tag] = "sha256:1"
+
+    parse_and_run(["grade", "-j", "2", "a1"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(lines) == ["fmm000> graded", "jtd111> graded"]
+
+
+def test_grade_prefixed_output_split_lines(clean_dir, parse_and_run,
+                                           fake_docker, capsys):
+    """Test prefixing output that doesn't arrive a line at a time
+    """
+    a, _ = make_assignment(clean_dir, parse_and_run, ["fmm000"])
+    fake_docker.images[a.image_tag] = "sha256:1"
+    fake_docker.grade_output = [b"gra", b"ded\nall ", b"done"]
+
+    parse_and_run(["grade", "-j", "2", "a1"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["fmm000> graded", "fmm000> all done"]
+
+
+def test_grade_serial_output_not_prefixed(clean_dir, parse_and_run,
+                                          fake_docker, capsys):
+    """Test that output from one-at-a-time grading is shown as-is
+    """
+    a, _ = make_assignment(clean_dir, parse_and_run, ["fmm000"])
+    fake_docker.images[a.image_tag] = "sha256:1"
+
+    parse_and_run(["grade", "a1"])
+
+    assert capsys.readouterr().out.splitlines() == ["graded"]
@@ -1,10 +1,15 @@
 import os
 import pytest
+import subprocess
 import tarfile
 import tempfile
 import yaml
 
+from concurrent.futures import ThreadPoolExecutor
+
+from grader.models import submission
 from grader.models.submission import SubmissionImportError
+from grader.utils import files
 
 
 def init_and_build_roster(p_and_r):
@@ -35,12 +40,13 @@ def make_student_folder(dest, student_id, filenames=["main.py"]):
     return student_dir
 
 
-def make_student_tarball(dest, student_id, filenames=["main.py"]):
+def make_student_tarball(dest, student_id, filenames=["main.py"],
+                         compression="gz"):
     student_tarball = os.path.join(dest, student_id + ".tar.gz")
 
     with tempfile.TemporaryDirectory() as tempdir:
         student_dir = make_student_folder(tempdir, student_id, filenames)
-        with tarfile.open(student_tarball, "w:gz") as tar:
+        with tarfile.open(student_tarball, "w:" + compression) as tar:
             tar.add(student_dir, student_id)
 
     return student_tarball
@@ -103,6 +109,53 @@ def test_make_student_tarball(clean_dir):
         assert os.listdir(os.path.join(tempdir, "jtd111")) == ["main.py"]
 
 
+def make_pigz_shim(dest, exit_code=0):
+    """Makes a stand-in for pigz that records its arguments and
+    compresses STDIN with gzip."""
+    shim_path = os.path.join(dest, "pigz")
+    with open(shim_path, 'w') as shim:
+        shim.write('#!/bin/sh\n'
+                   'echo "$@" > "{args}"\n'
+                   'gzip -c || exit 1\n'
+                   'exit {code}\n'.format(args=shim_path + ".args",
+                                          code=exit_code))
+    os.chmod(shim_path, 0o755)
+    return shim_path
+
+
+def test_make_tarball_with_pigz(clean_dir, monkeypatch):
+    """Test compressing a tarball with pigz
+    """
+    student_dir = make_student_folder(clean_dir, "jtd111")
+    shim_path = make_pigz_shim(clean_dir)
+    monkeypatch.setattr(files.shutil, "which",
+                        lambda cmd: shim_path if cmd == "pigz" else None)
+
+    tar_path, temp_path = files.make_tarball(student_dir, "jtd111",
+                                             threads=1)
+
+    with open(shim_path + ".args") as args:
+        assert args.read().split() == ["-6", "-p", "1"]
+    with tarfile.open(tar_path, "r:gz") as tar:
+        assert tar.getnames() == ["jtd111", "jtd111/main.py"]
+
+
+def test_make_tarball_with_failing_pigz(clean_dir, monkeypatch):
+    """Test that a failed pigz run doesn't leave anything behind
+    """
+    student_dir = make_student_folder(clean_dir, "jtd111")
+    shim_path = make_pigz_shim(clean_dir, exit_code=1)
+    monkeypatch.setattr(files.shutil, "which",
+                        lambda cmd: shim_path if cmd == "pigz" else None)
+
+    temp_dir = os.path.join(clean_dir, "tmp")
+    os.mkdir(temp_dir)
+    with pytest.raises(subprocess.CalledProcessError):
+        files.make_tarball(student_dir, "jtd111", temp_dir=temp_dir)
+
+    assert os.listdir(temp_dir) == []
+
+
 def test_import_single_folder(clean_dir, parse_and_run):
     """Test importing a single folder
     """
@@ -134,6 +187,125 @@ def test_import_single_tarball(clean_dir, parse_and_run):
     check_grader_tarfile(path, "jtd111")
 
 
+def test_import_single_uncompressed_tarball(clean_dir, parse_and_run):
+    """Test importing a single tarball that isn't actually gzipped
+    """
+    student_tarball = make_student_tarball(clean_dir, "jtd111",
+                                           compression="")
+
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+    parse_and_run(["import", "--kind=single",  "a1", student_tarball])
+
+    check_grader_tarfile(path, "jtd111")
+
+
+def test_import_single_uncompressed_tarball_with_link(clean_dir,
+                                                      parse_and_run):
+    """Test importing an uncompressed tarball containing a dangling link
+    """
+    student_tarball = os.path.join(clean_dir, "jtd111.tar.gz")
+    with tempfile.TemporaryDirectory() as tempdir:
+        student_dir = make_student_folder(tempdir, "jtd111")
+        os.symlink("../nowhere", os.path.join(student_dir, "link"))
+        with tarfile.open(student_tarball, "w") as tar:
+            tar.add(student_dir, "jtd111")
+
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+    parse_and_run(["import", "--kind=single", "a1", student_tarball])
+
+    a_path = os.path.join(path, "assignments", "a1")
+    assert sorted(os.listdir(a_path)) == ["gradesheet", "results",
+                                          "submissions"]
+
+    tar_filename, = os.listdir(os.path.join(a_path, "submissions"))
+    tar_path = os.path.join(a_path, "submissions", tar_filename)
+    with tarfile.open(tar_path, "r:gz") as tar:
+        link = tar.getmember("jtd111/link")
+        assert link.issym()
+        assert link.linkname == "../nowhere"
+        assert sorted(tar.getnames()) == ["jtd111", "jtd111/link",
+                                          "jtd111/main.py"]
+
+
+def test_import_multiple(clean_dir, parse_and_run):
+    """Test importing a folder of folders and tarballs
+    """
+    source = os.path.join(clean_dir, "submissions")
+    os.mkdir(source)
+    make_student_folder(source, "fmm000")
+    make_student_tarball(source, "jtd111")
+
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+    parse_and_run(["import", "--kind=multiple", "a1", source])
+
+    submission_dir = os.path.join(path, "assignments", "a1", "submissions")
+    imported = sorted(os.listdir(submission_dir))
+    assert len(imported) == 2
+    assert imported[0].startswith("fmm000--")
+    assert imported[1].startswith("jtd111--")
+
+    for tar_filename in imported:
+        student_id = tar_filename.split("--")[0]
+        with tarfile.open(os.path.join(submission_dir, tar_filename)) as tar:
+            assert tar.getnames() == [student_id,
+                                      "{}/main.py".format(student_id)]
+
+
+def test_import_multiple_skips_unknown_students(clean_dir, parse_and_run):
+    """Test that folders for students not on the roster are skipped, and
+    no temporary tarballs are left behind
+    """
+    source = os.path.join(clean_dir, "submissions")
+    os.mkdir(source)
+    make_student_folder(source, "fmm000")
+    make_student_folder(source, "nobody")
+
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+    parse_and_run(["import", "--kind=multiple", "a1", source])
+
+    a_path = os.path.join(path, "assignments", "a1")
+    assert sorted(os.listdir(a_path)) == ["gradesheet", "results",
+                                          "submissions"]
+
+    imported, = os.listdir(os.path.join(a_path, "submissions"))
+    assert imported.startswith("fmm000--")
+
+
+def test_import_multiple_failed_tarball(clean_dir, parse_and_run,
+                                        monkeypatch):
+    """Test that tarballs are cleaned up if compressing another one fails
+    """
+    source = os.path.join(clean_dir, "submissions")
+    os.mkdir(source)
+    make_student_folder(source, "fmm000")
+    make_student_folder(source, "jtd111")
+
+    path = init_and_build_roster(parse_and_run)
+    parse_and_run(["new", "a1"])
+
+    # Run the jobs in this process, so that they can be patched
+    def make_tarball(source, tar_basename, **kwargs):
+        if tar_basename == "jtd111":
+            raise OSError("No space left on device")
+        return files.make_tarball(source, tar_basename, **kwargs)
+
+    monkeypatch.setattr(submission, "ProcessPoolExecutor",
+                        ThreadPoolExecutor)
+    monkeypatch.setattr(submission, "make_tarball", make_tarball)
+
+    with pytest.raises(OSError):
+        parse_and_run(["import", "--kind=multiple", "a1", source])
+
+    a_path = os.path.join(path, "assignments", "a1")
+    assert sorted(os.listdir(a_path)) == ["gradesheet", "results",
+                                          "submissions"]
+    assert os.listdir(os.path.join(a_path, "submissions")) == []
+
+
 def test_import_tarball_with_file(clean_dir, parse_and_run):
     """Test importing a single tarball that contains a file instead of a
     directory.
@@ -0,0 +1,28 @@
+import threading
+
+from grader.models import mixins
+
+
+class FakeClient(object):
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_docker_client_per_thread(monkeypatch):
+    """Test that each thread gets (and keeps) its own docker client
+    """
+    monkeypatch.setattr(mixins.docker, "Client", FakeClient)
+    monkeypatch.setattr(mixins, "_local", threading.local())
+
+    a, b = mixins.DockerClientMixin(), mixins.DockerClientMixin()
+    assert a.docker_cli is b.docker_cli
+    assert a.docker_cli.kwargs['version'] == "auto"
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(a.docker_cli))
+    thread.start()
+    thread.join()
+
+    other, = others
+    assert isinstance(other, FakeClient)
+    assert other is not a.docker_cli
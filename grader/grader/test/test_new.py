@@ -1,8 +1,10 @@
+import git
 import os
 import pytest
+import tempfile
 import yaml
 
-from grader.models.gradesheet import GradeSheetError
+from grader.models.gradesheet import GradeSheet, GradeSheetError
 from grader.models.config import ConfigValidationError
 
 
@@ -62,6 +64,31 @@ def test_new_with_repo(parse_and_run):
     assert config['assignment-name'] == 'new-python-assignment'
 
 
+def test_new_with_repo_is_shallow(parse_and_run):
+    """Test that cloning a gradesheet only fetches the latest commit
+    """
+    with tempfile.TemporaryDirectory() as source:
+        # Make a gradesheet repo with a bit of history
+        GradeSheet.new(source, "assignment1")
+        repo = git.Repo(source)
+        readme_path = os.path.join(source, "README")
+        with open(readme_path, 'w') as readme:
+            readme.write("Hi!")
+        repo.index.add([readme_path])
+        repo.index.commit("Add a README")
+        repo.create_tag("v1")
+
+        path = parse_and_run(["init", "cpl"])
+        parse_and_run(["new", "assignment1", "file://{}".format(source)])
+
+    gs_path = os.path.join(path, "assignments", "assignment1", "gradesheet")
+    clone = git.Repo(gs_path)
+
+    assert os.path.exists(os.path.join(gs_path, "README"))
+    assert len(list(clone.iter_commits())) == 1
+    assert clone.tags == []
+
+
 def test_new_existing_assignment(parse_and_run):
     """Test overwriting an existing an assignment
     """
@@ -97,6 +124,21 @@ def test_new_bad_assignment_name(parse_and_run):
     assert not os.path.exists(a_path)
 
 
+def test_new_bad_assignment_name_with_repo(parse_and_run):
+    """Test that a bad name is rejected before cloning anything
+    """
+    path = parse_and_run(["init", "cpl"])
+
+    with pytest.raises(ConfigValidationError) as e:
+        parse_and_run(["new", "../nope",
+                       "git://github.com/michaelwisely/nope.git"])
+
+    assert '"../nope" is not a valid assignment name' in str(e.value)
+
+    assert not os.path.exists(os.path.join(path, "nope"))
+    assert os.listdir(os.path.join(path, "assignments")) == []
+
+
 def test_new_without_init(parse_and_run):
     """Test creating an assignment without a grader-wide config
     """